@@ -1,19 +1,45 @@
+import asyncio
 import datetime
+import functools
 import logging.config
 from environs import Env
 from seller import download_stock
 
+import httpx
 import requests
 
-from seller import divide, price_conversion
+from seller import (
+    create_async_session,
+    divide,
+    index_watches,
+    request_json,
+    select_watches,
+)
 
 logger = logging.getLogger(__file__)
 
+MARKET_URL = "https://api.partner.market.yandex.ru/"
+# Максимальное количество товаров в одном запросе к API Яндекс Маркета
+YM_PRICE_BATCH = 500
+YM_STOCK_BATCH = 2000
 
-def get_product_list(page, campaign_id, access_token):
+
+@functools.lru_cache(maxsize=4)
+def _ym_headers(access_token):
+    """Заголовки запросов к API Яндекс Маркета."""
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Host": "api.partner.market.yandex.ru",
+    }
+
+
+async def get_product_list(session, page, campaign_id, access_token):
     """Получить список товаров с Яндекс Маркета.
 
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         page (str): Идентификатор страницы c результатами.
                     Если параметр не указан, возвращается первая страница.
         campaign_id (str): Идентификатор магазина в кабинете.
@@ -24,37 +50,52 @@ def get_product_list(page, campaign_id, access_token):
 
     Raises:
         AttributeError: Если атрибуты page, campaign_id, access_token не являются строками.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
 
     Examples:
-        >>> get_product_list(page, campaign_id, access_token)
+        >>> await get_product_list(session, page, campaign_id, access_token)
             "paging": { "nextPageToken": "string" ... }
-        >>> get_product_list(page, incorrect_campaign_id, incorrect_access_token)
+        >>> await get_product_list(session, page, incorrect_campaign_id, incorrect_access_token)
             None
     """
-    endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {
         "page_token": page,
         "limit": 200,
     }
-    url = endpoint_url + f"campaigns/{campaign_id}/offer-mapping-entries"
-    response = requests.get(url, headers=headers, params=payload)
-    response.raise_for_status()
-    response_object = response.json()
+    url = MARKET_URL + f"campaigns/{campaign_id}/offer-mapping-entries"
+    headers = _ym_headers(access_token)
+    response_object = await request_json(
+        session, "GET", url, params=payload, headers=headers
+    )
     return response_object.get("result")
 
 
-def update_stocks(stocks, campaign_id, access_token):
+async def _iter_product_pages(session, campaign_id, market_token):
+    """Постранично получить товары, запрашивая следующую страницу заранее."""
+    task = asyncio.create_task(get_product_list(session, "", campaign_id, market_token))
+    try:
+        while task:
+            some_prod = await task
+            if not some_prod:
+                raise RuntimeError("Яндекс Маркет не вернул список товаров")
+            page = some_prod.get("paging").get("nextPageToken")
+            task = None
+            if page:
+                task = asyncio.create_task(
+                    get_product_list(session, page, campaign_id, market_token)
+                )
+            yield some_prod
+    finally:
+        if task:
+            task.cancel()
+
+
+async def update_stocks(session, stocks, campaign_id, access_token):
     """Обновить остатки товаров на сервере Яндекс Маркета.
 
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         stocks (list): Список остатков товаров.
         campaign_id (str): Идентификатор магазина в кабинете.
         access_token (str): Токен, необходимый для доступа к API.
@@ -64,35 +105,27 @@ def update_stocks(stocks, campaign_id, access_token):
 
     Raises:
         AttributeError: Если атрибуты stocks, campaign_id, access_token не являются строками.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
 
     Examples:
-        >>> update_stocks(stocks, client_id, seller_token)
+        >>> await update_stocks(session, stocks, client_id, seller_token)
         {"status": "OK"}
 
-        >>> update_stocks(stocks, client_id, incorrect_seller_token)
+        >>> await update_stocks(session, stocks, client_id, incorrect_seller_token)
         {"status": "OK", "errors": [{"code": "string", "message": "string"}]}
     """
-    endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {"skus": stocks}
-    url = endpoint_url + f"campaigns/{campaign_id}/offers/stocks"
-    response = requests.put(url, headers=headers, json=payload)
-    response.raise_for_status()
-    response_object = response.json()
-    return response_object
+    url = MARKET_URL + f"campaigns/{campaign_id}/offers/stocks"
+    headers = _ym_headers(access_token)
+    return await request_json(session, "PUT", url, payload, headers=headers)
 
 
-def update_price(prices, campaign_id, access_token):
+async def update_price(session, prices, campaign_id, access_token):
     """Обновить цены товаров
 
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         prices (list): Список цен, для обновления в магазине.
         campaign_id (str): Идентификатор магазина в кабинете.
         access_token (str): Токен, необходимый для доступа к API.
@@ -103,35 +136,29 @@ def update_price(prices, campaign_id, access_token):
     Raises:
         AttributeError: Если атрибуты client_id, seller_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
 
     Examples:
-        >>> update_price(price, 'client_id', 'seller_token')
+        >>> await update_price(session, price, 'client_id', 'seller_token')
         {"status": "OK"}
 
-        >>> update_price(price, 'client_id', 'incorrect_token')
+        >>> await update_price(session, price, 'client_id', 'incorrect_token')
         {"status": "OK", "errors": [{"code": "string", "message": "string"}]}
     """
-    endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {"offers": prices}
-    url = endpoint_url + f"campaigns/{campaign_id}/offer-prices/updates"
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    response_object = response.json()
-    return response_object
+    url = MARKET_URL + f"campaigns/{campaign_id}/offer-prices/updates"
+    headers = _ym_headers(access_token)
+    return await request_json(session, "POST", url, payload, headers=headers)
 
 
-def get_offer_ids(campaign_id, market_token):
+async def get_offer_ids(session, campaign_id, market_token):
     """Получить артикулы товаров Яндекс маркет
 
+    Следующая страница запрашивается, пока разбирается текущая.
+
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         campaign_id (str): Идентификатор магазина в кабинете.
         market_token (str): Токен, необходимый для доступа к API.
 
@@ -141,46 +168,62 @@ def get_offer_ids(campaign_id, market_token):
     Raises:
         AttributeError: Если атрибуты campaign_id, market_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-               либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
+        RuntimeError: Если Api не вернул список товаров.
 
     Examples:
-        >>> get_offer_ids('your_client_id', 'your_seller_token')
+        >>> await get_offer_ids(session, 'your_client_id', 'your_seller_token')
         ['136748', '321456', '236654', ...]
 
-        >>> get_offer_ids('your_client_id', 'incorrect_token')
-        None
+        >>> await get_offer_ids(session, 'your_client_id', 'incorrect_token')
+        httpx.HTTPStatusError: Client error '401 Unauthorized' for url 'https://api.partner.market.yandex.ru/campaigns/your_client_id/offer-mapping-entries'
     """
-    page = ""
-    product_list = []
-    while True:
-        some_prod = get_product_list(page, campaign_id, market_token)
-        product_list.extend(some_prod.get("offerMappingEntries"))
-        page = some_prod.get("paging").get("nextPageToken")
-        if not page:
-            break
     offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer").get("shopSku"))
+    async for some_prod in _iter_product_pages(session, campaign_id, market_token):
+        for product in some_prod.get("offerMappingEntries"):
+            offer_ids.append(product.get("offer").get("shopSku"))
     return offer_ids
 
 
-def create_stocks(watch_remnants, offer_ids, warehouse_id):
+def utc_timestamp():
+    """Текущее время UTC в формате updatedAt API Яндекс Маркета."""
+    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+
+def _make_stock(sku, count, warehouse_id, date):
+    """Остаток одного товара в формате API Яндекс Маркета."""
+    return {
+        "sku": sku,
+        "warehouseId": warehouse_id,
+        "items": [
+            {
+                "count": count,
+                "type": "FIT",
+                "updatedAt": date,
+            }
+        ],
+    }
+
+
+def create_stocks(watch_remnants, offer_ids, warehouse_id, date=None):
     """Создать остатки товаров магазина.
 
     Синхронизирует остатки часов с оптового магазина с Яндекс маркет.
     Товарам без остатка будет проставлен 0.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
         offer_ids (list): Список артикулов товаров Яндекс маркет.
         warehouse_id (string): Идентификатор склада на Яндекс маркет.
+        date (str): Время обновления остатков. По умолчанию - текущее.
 
     Returns:
         list: Список артикулов товаров с остатками
 
     Raises:
-        KeyError: Если ключи "Код", "Количество" отсутствуют в словаре watch
+        KeyError: Если таблица не подготовлена index_watches
 
     Examples:
         >>> create_stocks(watch_remnants, offer_ids, warehouse_id)
@@ -188,47 +231,20 @@ def create_stocks(watch_remnants, offer_ids, warehouse_id):
         >>> create_stocks(incorrect_watch_remnants, offer_ids, incorrect_warehouse_id)
         None
     """
+    if date is None:
+        date = utc_timestamp()
     # Уберем то, что не загружено в market
-    stocks = list()
-    date = str(datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z")
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append(
-                {
-                    "sku": str(watch.get("Код")),
-                    "warehouseId": warehouse_id,
-                    "items": [
-                        {
-                            "count": stock,
-                            "type": "FIT",
-                            "updatedAt": date,
-                        }
-                    ],
-                }
-            )
-            offer_ids.remove(str(watch.get("Код")))
+    watches = select_watches(watch_remnants, offer_ids)
+    stocks = [
+        _make_stock(code, stock, warehouse_id, date)
+        for code, stock in zip(watches.index, watches["stock"].tolist())
+    ]
     # Добавим недостающее из загруженного:
-    for offer_id in offer_ids:
-        stocks.append(
-            {
-                "sku": offer_id,
-                "warehouseId": warehouse_id,
-                "items": [
-                    {
-                        "count": 0,
-                        "type": "FIT",
-                        "updatedAt": date,
-                    }
-                ],
-            }
-        )
+    stocks.extend(
+        _make_stock(offer_id, 0, warehouse_id, date)
+        for offer_id in offer_ids
+        if offer_id not in watches.index
+    )
     return stocks
 
 
@@ -238,75 +254,125 @@ def create_prices(watch_remnants, offer_ids):
     Синхронизирует цены часов с оптового магазина с Яндекс маркет.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
         offer_ids (list): Список артикулов товаров Яндекс маркет.
 
     Returns:
         list: Список артикулов товаров с ценами
 
     Raises:
-        KeyError: Если ключи "Код", "Цена" отсутствуют в словаре watch
+        KeyError: Если таблица не подготовлена index_watches
     """
     prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "id": str(watch.get("Код")),
-                # "feed": {"id": 0},
-                "price": {
-                    "value": int(price_conversion(watch.get("Цена"))),
-                    # "discountBase": 0,
-                    "currencyId": "RUR",
-                    # "vat": 0,
-                },
-                # "marketSku": 0,
-                # "shopSku": "string",
-            }
-            prices.append(price)
+    watches = select_watches(watch_remnants, offer_ids)
+    values = watches["price"].astype(int)
+    for code, value in zip(watches.index, values.tolist()):
+        price = {
+            "id": code,
+            # "feed": {"id": 0},
+            "price": {
+                "value": value,
+                # "discountBase": 0,
+                "currencyId": "RUR",
+                # "vat": 0,
+            },
+            # "marketSku": 0,
+            # "shopSku": "string",
+        }
+        prices.append(price)
     return prices
 
 
-async def upload_prices(watch_remnants, campaign_id, market_token):
+async def upload_prices(session, watch_remnants, offer_ids, campaign_id, market_token):
     """Загрузить остакти товаров на сервер Яндекс маркет.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
+        offer_ids (list): Список артикулов товаров Яндекс маркет.
         campaign_id (str): Идентификатор магазина в кабинете.
         market_token (str): Токен, необходимый для доступа к API.
 
     Returns:
         tuple: Список артикулов товаров с информацией об остатках.
     """
-    offer_ids = get_offer_ids(campaign_id, market_token)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_prices in list(divide(prices, 500)):
-        update_price(some_prices, campaign_id, market_token)
+    await asyncio.gather(
+        *(
+            update_price(session, some_prices, campaign_id, market_token)
+            for some_prices in divide(prices, YM_PRICE_BATCH)
+        )
+    )
     return prices
 
 
-async def upload_stocks(watch_remnants, campaign_id, market_token, warehouse_id):
+async def upload_stocks(
+    session,
+    watch_remnants,
+    offer_ids,
+    campaign_id,
+    market_token,
+    warehouse_id,
+    date=None,
+):
     """Загрузить остакти товаров на сервер Яндкес маркета.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
+        offer_ids (list): Список артикулов товаров Яндекс маркет.
         campaign_id (str): Идентификатор магазина в кабинете.
         market_token (str): Токен, необходимый для доступа к API.
         warehouse_id (int): Идентификатор склада на Яндекс Маркет.
+        date (str): Время обновления остатков. По умолчанию - текущее.
 
     Returns:
         tuple: Список артикулов товаров с информацией об остатках.
     """
-    offer_ids = get_offer_ids(campaign_id, market_token)
-    stocks = create_stocks(watch_remnants, offer_ids, warehouse_id)
-    for some_stock in list(divide(stocks, 2000)):
-        update_stocks(some_stock, campaign_id, market_token)
-    not_empty = list(
-        filter(lambda stock: (stock.get("items")[0].get("count") != 0), stocks)
+    stocks = create_stocks(watch_remnants, offer_ids, warehouse_id, date)
+    await asyncio.gather(
+        *(
+            update_stocks(session, some_stock, campaign_id, market_token)
+            for some_stock in divide(stocks, YM_STOCK_BATCH)
+        )
     )
+    not_empty = [stock for stock in stocks if stock["items"][0]["count"] != 0]
     return not_empty, stocks
 
 
-def main():
+async def process_campaign(
+    session, watch_remnants, campaign_id, market_token, warehouse_id, date=None
+):
+    """Обновить остатки и цены товаров одного магазина Яндекс маркета.
+
+    Артикулы товаров запрашиваются один раз для остатков и цен.
+
+    Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
+        campaign_id (str): Идентификатор магазина в кабинете.
+        market_token (str): Токен, необходимый для доступа к API.
+        warehouse_id (int): Идентификатор склада на Яндекс Маркет.
+        date (str): Время обновления остатков. По умолчанию - текущее.
+    """
+    offer_ids = await get_offer_ids(session, campaign_id, market_token)
+    await upload_stocks(
+        session,
+        watch_remnants,
+        offer_ids,
+        campaign_id,
+        market_token,
+        warehouse_id,
+        date,
+    )
+    await upload_prices(session, watch_remnants, offer_ids, campaign_id, market_token)
+
+
+async def main_async():
     env = Env()
     market_token = env.str("MARKET_TOKEN")
     campaign_fbs_id = env.str("FBS_ID")
@@ -314,31 +380,58 @@ def main():
     warehouse_fbs_id = env.str("WAREHOUSE_FBS_ID")
     warehouse_dbs_id = env.str("WAREHOUSE_DBS_ID")
 
-    watch_remnants = download_stock()
+    watch_remnants = index_watches(download_stock())
+    # Общее время обновления остатков для FBS и DBS
+    date = utc_timestamp()
     try:
-        # FBS
-        offer_ids = get_offer_ids(campaign_fbs_id, market_token)
-        # Обновить остатки FBS
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_fbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_fbs_id, market_token)
-        # Поменять цены FBS
-        upload_prices(watch_remnants, campaign_fbs_id, market_token)
-
-        # DBS
-        offer_ids = get_offer_ids(campaign_dbs_id, market_token)
-        # Обновить остатки DBS
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_dbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_dbs_id, market_token)
-        # Поменять цены DBS
-        upload_prices(watch_remnants, campaign_dbs_id, market_token)
-    except requests.exceptions.ReadTimeout:
-        print("Превышено время ожидания...")
-    except requests.exceptions.ConnectionError as error:
-        print(error, "Ошибка соединения")
+        # FBS и DBS обновляются параллельно через общий пул соединений;
+        # ошибка одной кампании не прерывает загрузку другой
+        async with create_async_session() as session:
+            results = await asyncio.gather(
+                process_campaign(
+                    session,
+                    watch_remnants,
+                    campaign_fbs_id,
+                    market_token,
+                    warehouse_fbs_id,
+                    date,
+                ),
+                process_campaign(
+                    session,
+                    watch_remnants,
+                    campaign_dbs_id,
+                    market_token,
+                    warehouse_dbs_id,
+                    date,
+                ),
+                return_exceptions=True,
+            )
+        for campaign, result in zip(("FBS", "DBS"), results):
+            if isinstance(result, Exception):
+                _print_error(result, campaign)
     except Exception as error:
-        print(error, "ERROR_2")
+        _print_error(error)
+
+
+def _print_error(error, campaign=None):
+    """Вывести сообщение об ошибке обновления.
+
+    Args:
+        error (Exception): Перехваченное исключение.
+        campaign (str, optional): Кампания (FBS или DBS),
+            в которой произошла ошибка.
+    """
+    prefix = (f"{campaign}:",) if campaign else ()
+    if isinstance(error, (requests.exceptions.ReadTimeout, httpx.TimeoutException)):
+        print(*prefix, "Превышено время ожидания...")
+    elif isinstance(error, (requests.exceptions.ConnectionError, httpx.ConnectError)):
+        print(*prefix, error, "Ошибка соединения")
+    else:
+        print(*prefix, error, "ERROR_2")
+
+
+def main():
+    asyncio.run(main_async())
 
 
 if __name__ == "__main__":
@@ -1,21 +1,154 @@
+import asyncio
+import functools
 import io
 import logging.config
-import os
 import re
 import zipfile
 from environs import Env
 
+import httpx
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__file__)
 
+OZON_URL = "https://api-seller.ozon.ru/"
+# Максимальное количество товаров в одном запросе к API Озон
+OZON_PRICE_BATCH = 1000
+OZON_STOCK_BATCH = 100
+CASIO_URL = "https://timeworld.ru/"
+TIMEOUT = (5, 30)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_DELAYS = (0.3, 0.6, 1.2)
+MAX_RETRY_AFTER = 60
+# Не больше 8 запросов одновременно: HTTP/2 ограничивает только число соединений,
+# а не число потоков в них
+REQUEST_CONCURRENCY = 8
 
-def get_product_list(last_id, client_id, seller_token):
+# Все, начиная с первой точки, и нецифровые символы до нее
+PRICE_JUNK = re.compile(r"(?s)\..*|[^0-9]")
+
+
+def create_session(*base_urls):
+    """Создать сессию с пулом постоянных соединений.
+
+    Для каждого адреса монтируется адаптер с повторными попытками
+    при ошибках 429 и 5xx.
+
+    Args:
+        *base_urls (str): Базовые адреса API.
+
+    Returns:
+        requests.Session: Сессия для запросов к API.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUSES,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    for base_url in base_urls:
+        session.mount(base_url, adapter)
+    return session
+
+
+_SESSION = create_session(CASIO_URL)
+
+
+def create_async_session():
+    """Создать асинхронную сессию для параллельной отправки запросов.
+
+    Запросы к одному хосту мультиплексируются по HTTP/2
+    в небольшом пуле соединений. У клиента свой семафор request_limit,
+    поэтому клиент можно создавать заново в каждом запуске цикла событий.
+
+    Returns:
+        httpx.AsyncClient: Асинхронный клиент HTTP/2.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+    )
+    session = httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0]),
+    )
+    session.request_limit = asyncio.Semaphore(REQUEST_CONCURRENCY)
+    return session
+
+
+async def request_json(session, method, url, payload=None, **kwargs):
+    """Отправить запрос к API и вернуть ответ в виде JSON.
+
+    Тело запроса и ответ обрабатываются через orjson.
+    Одновременно выполняется не больше REQUEST_CONCURRENCY запросов.
+    При сетевых ошибках и ошибках 429, 5xx запрос повторяется
+    с нарастающей задержкой либо через время из заголовка Retry-After.
+
+    Args:
+        session (httpx.AsyncClient): Сессия из create_async_session.
+        method (str): HTTP-метод запроса.
+        url (str): Адрес запроса.
+        payload (dict): Тело запроса. Заголовок Content-Type: application/json
+                        должен быть передан в headers.
+        **kwargs: Параметры запроса httpx (params, headers).
+
+    Returns:
+        dict: Ответ от API.
+
+    Raises:
+        HTTPStatusError: Если API вернул ошибку.
+        TransportError: Если не удалось получить ответ после всех повторов.
+    """
+    if payload is not None:
+        kwargs["content"] = orjson.dumps(payload)
+    for delay in RETRY_DELAYS:
+        try:
+            async with session.request_limit:
+                response = await session.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                break
+            delay = _retry_after(response, delay)
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(delay)
+    else:
+        async with session.request_limit:
+            response = await session.request(method, url, **kwargs)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def _retry_after(response, delay):
+    """Задержка перед повтором с учетом заголовка Retry-After."""
+    try:
+        retry_after = float(response.headers.get("Retry-After", delay))
+    except ValueError:
+        # Retry-After в виде даты не разбираем, используем свою задержку
+        return delay
+    return min(max(retry_after, delay), MAX_RETRY_AFTER)
+
+
+@functools.lru_cache(maxsize=4)
+def _oz_headers(client_id, seller_token):
+    """Заголовки запросов к API Озон."""
+    return {
+        "Content-Type": "application/json",
+        "Client-Id": client_id,
+        "Api-Key": seller_token,
+    }
+
+
+async def get_product_list(session, last_id, client_id, seller_token):
     """Получить список товаров магазина озон
 
     Отправка запроса к Ozon Api для получения списка всех товаров.
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         last_id (str): Идентификатор последнего товара для постраничного доступа.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
@@ -26,20 +159,16 @@ def get_product_list(last_id, client_id, seller_token):
     Raises:
         AttributeError: Если атрибуты last_id, client_id, seller_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
 
     Examples:
-        >>> get_product_list('', 'client_id', 'seller_token')
+        >>> await get_product_list(session, '', 'client_id', 'seller_token')
         "items": [{"archived": true ... }]}
-        >>> get_product_list('', 'incorrect_client_id', 'incorrect_seller_token')
+        >>> await get_product_list(session, '', 'incorrect_client_id', 'incorrect_seller_token')
         None
     """
-    url = "https://api-seller.ozon.ru/v2/product/list"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
+    url = OZON_URL + "v2/product/list"
     payload = {
         "filter": {
             "visibility": "ALL",
@@ -47,16 +176,41 @@ def get_product_list(last_id, client_id, seller_token):
         "last_id": last_id,
         "limit": 1000,
     }
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    response_object = response.json()
+    headers = _oz_headers(client_id, seller_token)
+    response_object = await request_json(session, "POST", url, payload, headers=headers)
     return response_object.get("result")
 
 
-def get_offer_ids(client_id, seller_token):
+async def _iter_product_pages(session, client_id, seller_token):
+    """Постранично получить товары, запрашивая следующую страницу заранее."""
+    received = 0
+    task = asyncio.create_task(get_product_list(session, "", client_id, seller_token))
+    try:
+        while task:
+            some_prod = await task
+            if not some_prod:
+                raise RuntimeError("Озон не вернул список товаров")
+            received += len(some_prod.get("items"))
+            task = None
+            if some_prod.get("items") and received < some_prod.get("total"):
+                task = asyncio.create_task(
+                    get_product_list(
+                        session, some_prod.get("last_id"), client_id, seller_token
+                    )
+                )
+            yield some_prod
+    finally:
+        if task:
+            task.cancel()
+
+
+async def get_offer_ids(session, client_id, seller_token):
     """Получить артикулы товаров магазина озон
 
+    Следующая страница запрашивается, пока разбирается текущая.
+
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
 
@@ -66,35 +220,29 @@ def get_offer_ids(client_id, seller_token):
     Raises:
         AttributeError: Если атрибуты client_id, seller_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-               либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
+        RuntimeError: Если Api не вернул список товаров.
 
     Examples:
-        >>> get_offer_ids('client_id', 'seller_token')
+        >>> await get_offer_ids(session, 'client_id', 'seller_token')
         ['136748', '321456', '236654', ...]
 
-        >>> get_offer_ids('client_id', 'incorrect_token')
-        None
+        >>> await get_offer_ids(session, 'client_id', 'incorrect_token')
+        httpx.HTTPStatusError: Client error '401 Unauthorized' for url 'https://api-seller.ozon.ru/v2/product/list'
     """
-    last_id = ""
-    product_list = []
-    while True:
-        some_prod = get_product_list(last_id, client_id, seller_token)
-        product_list.extend(some_prod.get("items"))
-        total = some_prod.get("total")
-        last_id = some_prod.get("last_id")
-        if total == len(product_list):
-            break
     offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer_id"))
+    async for some_prod in _iter_product_pages(session, client_id, seller_token):
+        for product in some_prod.get("items"):
+            offer_ids.append(product.get("offer_id"))
     return offer_ids
 
 
-def update_price(prices: list, client_id, seller_token):
+async def update_price(session, prices: list, client_id, seller_token):
     """Обновить цены товаров
 
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         prices (list): Список цен, для обновления в магазине.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
@@ -105,31 +253,27 @@ def update_price(prices: list, client_id, seller_token):
     Raises:
         AttributeError: Если атрибуты last_id, client_id, seller_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
 
     Examples:
-        >>> update_price(price, 'client_id', 'seller_token')
+        >>> await update_price(session, price, 'client_id', 'seller_token')
         {'success': True, 'updated_count': 1}
 
-        >>> update_price(price, 'client_id', 'incorrect_token')
+        >>> await update_price(session, price, 'client_id', 'incorrect_token')
         {"code": 0, "details": [{"typeUrl": "string","value": "string"}], "message": "string"}
     """
-    url = "https://api-seller.ozon.ru/v1/product/import/prices"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
+    url = OZON_URL + "v1/product/import/prices"
     payload = {"prices": prices}
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    headers = _oz_headers(client_id, seller_token)
+    return await request_json(session, "POST", url, payload, headers=headers)
 
 
-def update_stocks(stocks: list, client_id, seller_token):
+async def update_stocks(session, stocks: list, client_id, seller_token):
     """Обновить остатки
 
     Args:
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
         stocks (list): Список остатков товаров.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
@@ -140,61 +284,53 @@ def update_stocks(stocks: list, client_id, seller_token):
     Raises:
         AttributeError: Если атрибуты last_id, client_id, seller_token
                         не строчного типа данных.
-        HTTPError: При неуспешной попытке передать запрос
-                   либо при неуспешной попытке получения ответа от Api.
+        HTTPStatusError: При неуспешной попытке передать запрос
+                         либо при неуспешной попытке получения ответа от Api.
     Examples:
-        >>> update_stocks(stocks, client_id, seller_token)
+        >>> await update_stocks(session, stocks, client_id, seller_token)
         {"result": [{"product_id": 55946,"offer_id": "PG-2404С1", "updated": true, "errors": []}]}
 
-        >>> update_stocks(stocks, client_id, incorrect_seller_token)
+        >>> await update_stocks(session, stocks, client_id, incorrect_seller_token)
         {"code": 0,"details": [{"typeUrl": "string", "value": "string"}], "message": "string"}
     """
-    url = "https://api-seller.ozon.ru/v1/product/import/stocks"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
+    url = OZON_URL + "v1/product/import/stocks"
     payload = {"stocks": stocks}
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    headers = _oz_headers(client_id, seller_token)
+    return await request_json(session, "POST", url, payload, headers=headers)
 
 
 def download_stock():
     """Скачать файл ostatki с сайта casio
 
     Returns:
-        dict: Cловарь c информацией о часах.
+        DataFrame: Таблица c информацией о часах.
 
     Raises:
         RequestException: если URL недоступен, нет интернета или
                           сервер вернул ошибку (404, 500 и т. д.)
         Exception: Общая ошибка, если возникли проблемы с загрузкой
                    или обработкой файла.
-        PermissionError: если нет прав на запись в текущую папку.
 
     Examples:
         >>> dowload_stock()
-            {'Код':73668, 'Наименование товара':'BA-110AQ-4A', 'Цена':'19'990.00 руб.'}
+                Код Наименование товара            Цена
+            0  73668         BA-110AQ-4A  19'990.00 руб.
         >>> dowload_stock()
             requests.exceptions.HTTPError: 403 Client Error: Forbidden for url: https://timeworld.ru/upload/files/ostatki.zip
     """
     # Скачать остатки с сайта
-    casio_url = "https://timeworld.ru/upload/files/ostatki.zip"
-    session = requests.Session()
-    response = session.get(casio_url)
+    casio_url = CASIO_URL + "upload/files/ostatki.zip"
+    response = _SESSION.get(casio_url, timeout=TIMEOUT)
     response.raise_for_status()
-    with response, zipfile.ZipFile(io.BytesIO(response.content)) as archive:
-        archive.extractall(".")
-    # Создаем список остатков часов:
-    excel_file = "ostatki.xls"
-    watch_remnants = pd.read_excel(
-        io=excel_file,
-        na_values=None,
-        keep_default_na=False,
-        header=17,
-    ).to_dict(orient="records")
-    os.remove("./ostatki.xls")  # Удалить файл
+    # Создаем список остатков часов прямо из архива, не распаковывая на диск:
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        with archive.open("ostatki.xls") as excel_file:
+            watch_remnants = pd.read_excel(
+                io=excel_file,
+                na_values=None,
+                keep_default_na=False,
+                header=17,
+            )
     return watch_remnants
 
 
@@ -205,14 +341,15 @@ def create_stocks(watch_remnants, offer_ids):
     Товарам без остатка будет проставлен 0.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
         offer_ids (list): Список артикулов товаров магазина Озон.
 
     Returns:
         list: Список артикулов товаров с остатками
 
     Raises:
-        KeyError: Если ключи "Код", "Количество" отсутствуют в словаре watch
+        KeyError: Если таблица не подготовлена index_watches
 
     Examples:
         >>> create_stocks(watch_remnants, offer_ids, warehouse_id)
@@ -221,21 +358,17 @@ def create_stocks(watch_remnants, offer_ids):
         None
     """
     # Уберем то, что не загружено в seller
-    stocks = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append({"offer_id": str(watch.get("Код")), "stock": stock})
-            offer_ids.remove(str(watch.get("Код")))
+    watches = select_watches(watch_remnants, offer_ids)
+    stocks = pd.DataFrame(
+        {
+            "offer_id": watches.index,
+            "stock": watches["stock"].tolist(),
+        }
+    ).to_dict(orient="records")
     # Добавим недостающее из загруженного:
     for offer_id in offer_ids:
-        stocks.append({"offer_id": offer_id, "stock": 0})
+        if offer_id not in watches.index:
+            stocks.append({"offer_id": offer_id, "stock": 0})
     return stocks
 
 
@@ -245,51 +378,103 @@ def create_prices(watch_remnants, offer_ids):
     Синхронизирует цены часов с оптового магазина с магазином OZON.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
         offer_ids (list): Список артикулов товаров магазина Озон.
 
     Returns:
         list: Список артикулов товаров с ценами
 
     Raises:
-        KeyError: Если ключи "Код", "Цена" отсутствуют в словаре watch
+        KeyError: Если таблица не подготовлена index_watches
     """
-    prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "auto_action_enabled": "UNKNOWN",
-                "currency_code": "RUB",
-                "offer_id": str(watch.get("Код")),
-                "old_price": "0",
-                "price": price_conversion(watch.get("Цена")),
-            }
-            prices.append(price)
-    return prices
+    watches = select_watches(watch_remnants, offer_ids)
+    prices = pd.DataFrame(
+        {
+            "auto_action_enabled": "UNKNOWN",
+            "currency_code": "RUB",
+            "offer_id": watches.index,
+            "old_price": "0",
+            "price": watches["price"].tolist(),
+        }
+    )
+    return prices.to_dict(orient="records")
 
 
-def price_conversion(price: str) -> str:
-    """Преобразовать цену.
+def index_watches(watch_remnants):
+    """Подготовить таблицу остатков к сопоставлению с артикулами.
 
-    Убирает из передаваемой в нее строки все нецифровые символы.
-    Десятичная часть числа убирается.
+    Остатки и цены преобразуются один раз, чтобы таблицу можно было
+    использовать для нескольких магазинов.
 
     Args:
-        price (str): Строка с ценой товара.
+        watch_remnants (DataFrame): Таблица, полученная из download_stock.
 
     Returns:
-        str: Строка содержащая отформатированную цену.
+        DataFrame: Столбцы "stock" и "price", индекс - "Код" в виде строки.
+                   Для повторяющихся артикулов остается первая строка.
 
     Raises:
-        AttributeError: Если price не строчного типа данных.
+        KeyError: Если столбцы "Код", "Количество", "Цена" отсутствуют в таблице
+    """
+    watches = pd.DataFrame(
+        {
+            "stock": convert_stocks(watch_remnants["Количество"]),
+            "price": convert_prices(watch_remnants["Цена"]),
+        }
+    ).set_axis(watch_remnants["Код"].astype(str))
+    return watches[~watches.index.duplicated()]
+
+
+def select_watches(watches, offer_ids):
+    """Выбрать из таблицы остатков часы, загруженные в магазин.
+
+    Args:
+        watches (DataFrame): Таблица, подготовленная index_watches.
+        offer_ids (list): Список артикулов товаров магазина.
+
+    Returns:
+        DataFrame: Строки с артикулами из offer_ids.
+    """
+    return watches[watches.index.isin(offer_ids)]
+
+
+def convert_stocks(counts):
+    """Преобразовать остатки.
+
+    Остаток ">10" превращается в 100, остаток 1 считается отсутствием товара.
+
+    Args:
+        counts (Series): Столбец "Количество" таблицы остатков.
+
+    Returns:
+        Series: Остатки в виде целых чисел.
+
+    Examples:
+        >>> convert_stocks(pd.Series([">10", 1, 5])).tolist()
+        [100, 0, 5]
+    """
+    counts = counts.astype(str)
+    stocks = pd.to_numeric(counts, errors="coerce").fillna(0).astype(int)
+    return stocks.mask(counts == ">10", 100).mask(counts == "1", 0)
+
+
+def convert_prices(prices):
+    """Преобразовать столбец цен.
+
+    Убирает из цен все нецифровые символы, десятичная часть числа убирается.
+
+    Args:
+        prices (Series): Столбец "Цена" таблицы остатков.
+
+    Returns:
+        Series: Строки с отформатированными ценами.
 
     Examples:
-        >>> print(price_conversion('19'990.00 руб.'))
-        '19990'
-        >>> price_conversion("X̅MX̅CMXC")
-        ''
+        >>> convert_prices(pd.Series(["19'990.00 руб."])).tolist()
+        ['19990']
     """
-    return re.sub("[^0-9]", "", price.split(".")[0])
+    return prices.astype(str).str.replace(PRICE_JUNK, "", regex=True)
 
 
 def divide(lst: list, n: int):
@@ -304,69 +489,88 @@ def divide(lst: list, n: int):
     Raises:
         ValueError: Если `n` <= 0.
     """
+    if n <= 0:
+        raise ValueError("n должно быть больше 0")
     for i in range(0, len(lst), n):
         yield lst[i: i + n]
 
 
-async def upload_prices(watch_remnants, client_id, seller_token):
+async def upload_prices(session, watch_remnants, offer_ids, client_id, seller_token):
     """Загрузить цены товаров на сервер Озон.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
+        offer_ids (list): Список артикулов товаров магазина Озон.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
 
     Returns:
         list: Список артикулов товаров с ценами.
     """
-    offer_ids = get_offer_ids(client_id, seller_token)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_price in list(divide(prices, 1000)):
-        update_price(some_price, client_id, seller_token)
+    await asyncio.gather(
+        *(
+            update_price(session, some_price, client_id, seller_token)
+            for some_price in divide(prices, OZON_PRICE_BATCH)
+        )
+    )
     return prices
 
 
-async def upload_stocks(watch_remnants, client_id, seller_token):
+async def upload_stocks(session, watch_remnants, offer_ids, client_id, seller_token):
     """Загрузить остакти товаров на сервер Озон.
 
     Args:
-        watch_remnants (dict): Словарь с информацией о часах.
+        session (httpx.AsyncClient): Асинхронная сессия для запросов к API.
+        watch_remnants (DataFrame): Таблица с информацией о часах,
+                                    подготовленная index_watches.
+        offer_ids (list): Список артикулов товаров магазина Озон.
         client_id (str): id клиента, нужен для авторизации.
         seller_token (str): Токен, необходимый для доступа к API.
 
     Returns:
         tuple: Список артикулов товаров с информацией об остатках.
     """
-    offer_ids = get_offer_ids(client_id, seller_token)
     stocks = create_stocks(watch_remnants, offer_ids)
-    for some_stock in list(divide(stocks, 100)):
-        update_stocks(some_stock, client_id, seller_token)
-    not_empty = list(filter(lambda stock: (stock.get("stock") != 0), stocks))
+    await asyncio.gather(
+        *(
+            update_stocks(session, some_stock, client_id, seller_token)
+            for some_stock in divide(stocks, OZON_STOCK_BATCH)
+        )
+    )
+    not_empty = [stock for stock in stocks if stock["stock"] != 0]
     return not_empty, stocks
 
 
-def main():
+async def main_async():
     env = Env()
     seller_token = env.str("SELLER_TOKEN")
     client_id = env.str("CLIENT_ID")
     try:
-        offer_ids = get_offer_ids(client_id, seller_token)
-        watch_remnants = download_stock()
-        # Обновить остатки
-        stocks = create_stocks(watch_remnants, offer_ids)
-        for some_stock in list(divide(stocks, 100)):
-            update_stocks(some_stock, client_id, seller_token)
-        # Поменять цены
-        prices = create_prices(watch_remnants, offer_ids)
-        for some_price in list(divide(prices, 900)):
-            update_price(some_price, client_id, seller_token)
-    except requests.exceptions.ReadTimeout:
+        async with create_async_session() as session:
+            offer_ids = await get_offer_ids(session, client_id, seller_token)
+            watch_remnants = index_watches(download_stock())
+            # Обновить остатки
+            await upload_stocks(
+                session, watch_remnants, offer_ids, client_id, seller_token
+            )
+            # Поменять цены
+            await upload_prices(
+                session, watch_remnants, offer_ids, client_id, seller_token
+            )
+    except (requests.exceptions.ReadTimeout, httpx.TimeoutException):
         print("Превышено время ожидания...")
-    except requests.exceptions.ConnectionError as error:
+    except (requests.exceptions.ConnectionError, httpx.ConnectError) as error:
         print(error, "Ошибка соединения")
     except Exception as error:
         print(error, "ERROR_2")
 
 
+def main():
+    asyncio.run(main_async())
+
+
 if __name__ == "__main__":
     main()